@@ -1,11 +1,29 @@
 import os
+import asyncio
 import streamlit as st
-from openai import OpenAI
-import json
+from streamlit.logger import get_logger
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError, RateLimitError
+import httpx
+import orjson
+import ijson
 import re
+import hashlib
+import time
+import tempfile
+from urllib.parse import quote
+import tiktoken
+from collections import Counter
+from collections.abc import Hashable
+from functools import lru_cache
+from typing import NamedTuple
 from file_extractors import extract_text_from_file
+from local_analyzer import local_analyze, LOCAL_MAX_CHARS
 from dotenv import load_dotenv
 
+# Streamlit's logger has a handler and level set; a plain logging logger
+# would drop INFO records such as the token usage lines
+logger = get_logger(__name__)
+
 # ---------- PAGE CONFIG ----------
 st.set_page_config(page_title="Multi-Platform Job Search Generator", layout="wide")
 
@@ -13,66 +31,149 @@ st.title("💼 Multi-Platform Job Search Generator")
 st.caption("Generate optimized search strings for LinkedIn Recruiter & DevelopmentAid")
 
 # ---------- INITIALIZE SESSION STATE ----------
-if 'analysis_results' not in st.session_state:
-    st.session_state.analysis_results = None
-
-if 'domain_detected' not in st.session_state:
-    st.session_state.domain_detected = None
+# Results live in session state so widget reruns redraw them without a new API call
+st.session_state.setdefault('analysis_results', None)
+st.session_state.setdefault('domain_detected', None)
+st.session_state.setdefault('exports', None)
+st.session_state.setdefault('extracted_file_id', None)
+st.session_state.setdefault('extracted_text', "")
 
 # ---------- API CONFIG ----------
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY", None)
 
-if not api_key and "OPENAI_API_KEY" in st.secrets:
-    api_key = st.secrets["OPENAI_API_KEY"]
+@st.cache_resource
+def load_env_once():
+    """Parse .env once per process rather than on every rerun"""
+    return load_dotenv()
+
+
+def get_api_key():
+    """Resolve the OpenAI API key (.env / environment first, then Streamlit Secrets)"""
+    load_env_once()
+    if os.getenv("OPENAI_API_KEY"):
+        return os.getenv("OPENAI_API_KEY")
+    try:
+        return st.secrets.get("OPENAI_API_KEY")
+    except FileNotFoundError:
+        # No secrets.toml at all; local searches still work without a key
+        return None
+
+
+# HTTP/2 lets the concurrent per-platform streams share one connection
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=4)
+
+# The SDK retries 429s, 5xx and connection errors with exponential backoff and jitter
+OPENAI_MAX_RETRIES = 5
+
+
+@st.cache_resource
+def get_openai_client(api_key: str) -> OpenAI:
+    """Shared OpenAI client so the HTTP connection pool survives Streamlit reruns"""
+    http_client = httpx.Client(http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return OpenAI(api_key=api_key, http_client=http_client, max_retries=OPENAI_MAX_RETRIES)
+
+
+api_key = get_api_key()
 
 if not api_key:
     st.error("❌ No API key found. Please set OPENAI_API_KEY in Streamlit Secrets or a .env file.")
 else:
     st.success("🔐 API key loaded securely.")
 
-model = st.selectbox("🧠 Choose Model", ["gpt-4o", "gpt-4-turbo", "gpt-4", "gpt-3.5-turbo"])
-
 # ---------- JOB DESCRIPTION INPUT ----------
 uploaded_file = st.file_uploader("📄 Upload Job Description", type=["txt", "pdf", "docx"])
 job_description = st.text_area("Or paste job description text", height=250)
 
 if uploaded_file and not job_description.strip():
-    job_description = extract_text_from_file(uploaded_file)
+    # file_id changes with every upload, so reruns skip even hashing the file bytes
+    if st.session_state.extracted_file_id != uploaded_file.file_id:
+        st.session_state.extracted_text = extract_text_from_file(uploaded_file.getvalue(), uploaded_file.type)
+        st.session_state.extracted_file_id = uploaded_file.file_id
+    job_description = st.session_state.extracted_text
 
 # ---------- OPTIONS ----------
 st.divider()
 st.subheader("⚙️ Platform & Search Options")
 
-col1, col2 = st.columns(2)
-with col1:
-    platform = st.selectbox("Target Platform", ["both", "linkedin", "developmentaid"])
-with col2:
-    domain = st.selectbox("Industry/Domain", ["auto_detect", "software_engineering", "international_development", "finance", "healthcare", "consulting", "general"])
-
-col1, col2, col3 = st.columns(3)
-include_location = col1.checkbox("Include location terms", True)
-include_seniority = col2.checkbox("Include seniority levels", True)
-include_variations = col3.checkbox("Generate search variations", True)
+# A form batches option changes into a single rerun on submit
+with st.form("search_options"):
+    model = st.selectbox("🧠 Choose Model", ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo", "gpt-4", "gpt-3.5-turbo"])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        platform = st.selectbox("Target Platform", ["both", "linkedin", "developmentaid"])
+    with col2:
+        domain = st.selectbox("Industry/Domain", ["auto_detect", "software_engineering", "international_development", "finance", "healthcare", "consulting", "general"])
+    
+    col1, col2, col3 = st.columns(3)
+    include_location = col1.checkbox("Include location terms", True)
+    include_seniority = col2.checkbox("Include seniority levels", True)
+    include_variations = col3.checkbox("Generate search variations", True)
+    use_local = st.checkbox(
+        f"⚡ Build searches locally for short job descriptions (under {LOCAL_MAX_CHARS} characters, no API call)", False
+    )
+    
+    submitted = st.form_submit_button("🔍 Generate Optimized Search Strings", type="primary")
 
 
 # ---------- VALIDATION FUNCTIONS ----------
 
-def validate_linkedin_search(search_string: str) -> dict:
+_RE_ANY_BOOL = re.compile(r'\b(AND|OR|NOT)\b', re.IGNORECASE)
+_RE_UPPER_BOOL = re.compile(r'\b(AND|OR|NOT)\b')
+_RE_LEADING_WILDCARD = re.compile(r'\*\w+')
+_RE_WILDCARD_IN_QUOTE = re.compile(r'"[^"]*\*[^"]*"')
+_RE_QUOTED_PHRASE = re.compile(r'"[^"]*"')
+
+
+# Validators are memoized per search string, so results are immutable tuples
+class LinkedInValidation(NamedTuple):
+    valid: bool
+    issues: tuple
+    warnings: tuple
+    complexity_score: float
+    and_count: int
+    or_count: int
+    title_count: int
+    length: int
+
+
+class DevelopmentAidValidation(NamedTuple):
+    valid: bool
+    issues: tuple
+    warnings: tuple
+    complexity_score: float
+    and_count: int
+    or_count: int
+    not_count: int
+    length: int
+
+
+class ResultEstimate(NamedTuple):
+    estimated_range: str
+    score: float
+    quality: str
+
+
+@lru_cache(maxsize=256)
+def validate_linkedin_search(search_string: str) -> LinkedInValidation:
     """Validate LinkedIn Boolean search syntax"""
     issues = []
     warnings = []
+    chars = Counter(search_string)  # one C-level pass instead of a str.count per character
+    # Words inside quotes are literal text ("Monitoring and Evaluation"), not operators
+    unquoted = _RE_QUOTED_PHRASE.sub(" ", search_string)
+    operators = [m.group(1) for m in _RE_ANY_BOOL.finditer(unquoted)]
     
     # Check for lowercase boolean operators
-    if re.search(r'\b(and|or|not)\b', search_string):
+    if any(op.islower() for op in operators):
         issues.append("Boolean operators must be UPPERCASE (AND, OR, NOT)")
     
     # Check quote pairing
-    if search_string.count('"') % 2 != 0:
+    if chars['"'] % 2 != 0:
         issues.append("Unmatched quotes detected")
     
     # Check parentheses balance
-    if search_string.count('(') != search_string.count(')'):
+    if chars['('] != chars[')']:
         issues.append("Unmatched parentheses")
     
     # Check length
@@ -80,8 +181,9 @@ def validate_linkedin_search(search_string: str) -> dict:
         warnings.append("Search string very long (>1000 chars) - may be slow")
     
     # Count complexity
-    and_count = search_string.upper().count(' AND ')
-    or_count = search_string.upper().count(' OR ')
+    operator_counts = Counter(op.upper() for op in operators)
+    and_count = operator_counts['AND']
+    or_count = operator_counts['OR']
     title_count = search_string.lower().count('title:')
     
     # Complexity scoring
@@ -93,19 +195,20 @@ def validate_linkedin_search(search_string: str) -> dict:
     if title_count > 2:
         warnings.append(f"Multiple title: operators ({title_count}) - very restrictive")
     
-    return {
-        "valid": len(issues) == 0,
-        "issues": issues,
-        "warnings": warnings,
-        "complexity_score": round(complexity_score, 1),
-        "and_count": and_count,
-        "or_count": or_count,
-        "title_count": title_count,
-        "length": len(search_string)
-    }
-
-
-def estimate_linkedin_results(search_string: str) -> dict:
+    return LinkedInValidation(
+        valid=len(issues) == 0,
+        issues=tuple(issues),
+        warnings=tuple(warnings),
+        complexity_score=round(complexity_score, 1),
+        and_count=and_count,
+        or_count=or_count,
+        title_count=title_count,
+        length=len(search_string)
+    )
+
+
+@lru_cache(maxsize=256)
+def estimate_linkedin_results(search_string: str) -> ResultEstimate:
     """Estimate LinkedIn result count based on complexity"""
     validation = validate_linkedin_search(search_string)
     
@@ -113,13 +216,13 @@ def estimate_linkedin_results(search_string: str) -> dict:
     score = 100  # Start at baseline
     
     # Each AND dramatically reduces results
-    score *= (0.35 ** validation['and_count'])
+    score *= (0.35 ** validation.and_count)
     
     # Title operator is very restrictive
-    score *= (0.25 ** validation['title_count'])
+    score *= (0.25 ** validation.title_count)
     
     # Length penalty
-    if validation['length'] > 500:
+    if validation.length > 500:
         score *= 0.7
     
     # Estimate range
@@ -136,28 +239,31 @@ def estimate_linkedin_results(search_string: str) -> dict:
         estimate = "0-20"
         quality = "❌ Likely too restrictive"
     
-    return {
-        "estimated_range": estimate,
-        "score": round(score, 1),
-        "quality": quality
-    }
+    return ResultEstimate(
+        estimated_range=estimate,
+        score=round(score, 1),
+        quality=quality
+    )
 
 
-def validate_developmentaid_search(search_string: str) -> dict:
+@lru_cache(maxsize=256)
+def validate_developmentaid_search(search_string: str) -> DevelopmentAidValidation:
     """Validate DevelopmentAid search syntax"""
     issues = []
     warnings = []
+    chars = Counter(search_string)  # one C-level pass instead of a str.count per character
+    operators = list(_RE_UPPER_BOOL.finditer(search_string))
     
     # Check for LinkedIn-style operators
-    if re.search(r'\b(AND|OR|NOT)\b', search_string):
+    if operators:
         warnings.append("Using uppercase AND/OR/NOT - DevelopmentAid uses +, |, - instead")
     
     # Check quote pairing
-    if search_string.count('"') % 2 != 0:
+    if chars['"'] % 2 != 0:
         issues.append("Unmatched quotes detected")
     
     # Check parentheses balance
-    if search_string.count('(') != search_string.count(')'):
+    if chars['('] != chars[')']:
         issues.append("Unmatched parentheses")
     
     # Check for boost operator usage
@@ -165,38 +271,39 @@ def validate_developmentaid_search(search_string: str) -> dict:
         warnings.append("Boost operator ^ should be used with OR (|)")
     
     # Check for invalid wildcard usage
-    if re.search(r'\*\w+', search_string):
+    if _RE_LEADING_WILDCARD.search(search_string):
         issues.append("Wildcard * cannot be used before word stem (e.g., *finance is invalid)")
     
-    if re.search(r'"[^"]*\*[^"]*"', search_string):
+    if _RE_WILDCARD_IN_QUOTE.search(search_string):
         issues.append("Wildcard * cannot be used inside quoted phrases")
     
-    # Count operators
-    and_count = search_string.count('+') + search_string.count(' AND ')
-    or_count = search_string.count('|') + search_string.count(' OR ')
-    not_count = search_string.count('-') + search_string.count(' NOT ')
+    # Count operators; word operators only count when space-delimited (" AND ")
+    spaced_operators = Counter(
+        m.group(1) for m in operators
+        if search_string[m.start() - 1:m.start()] == ' ' and search_string[m.end():m.end() + 1] == ' '
+    )
+    and_count = chars['+'] + spaced_operators['AND']
+    or_count = chars['|'] + spaced_operators['OR']
+    not_count = chars['-'] + spaced_operators['NOT']
     
     complexity_score = (and_count * 1.5) + (or_count * 0.3) + (not_count * 1)
     
-    return {
-        "valid": len(issues) == 0,
-        "issues": issues,
-        "warnings": warnings,
-        "complexity_score": round(complexity_score, 1),
-        "and_count": and_count,
-        "or_count": or_count,
-        "not_count": not_count,
-        "length": len(search_string)
-    }
+    return DevelopmentAidValidation(
+        valid=len(issues) == 0,
+        issues=tuple(issues),
+        warnings=tuple(warnings),
+        complexity_score=round(complexity_score, 1),
+        and_count=and_count,
+        or_count=or_count,
+        not_count=not_count,
+        length=len(search_string)
+    )
 
 
 # ---------- DOMAIN CONTEXT ----------
 
-def get_domain_context(domain: str) -> str:
-    """Get domain-specific search context and examples"""
-    
-    contexts = {
-        "software_engineering": """
+DOMAIN_CONTEXTS = {
+    "software_engineering": """
 ## Software Engineering Context:
 
 **Profile Language Patterns:**
@@ -221,8 +328,8 @@ def get_domain_context(domain: str) -> str:
 "Machine Learning" → ML, AI, Data Science, "built models", "trained algorithms", TensorFlow, PyTorch
 "Cloud" → AWS, Azure, GCP, "cloud infrastructure", "deployed to cloud", Docker, Kubernetes
 """,
-        
-        "international_development": """
+    
+    "international_development": """
 ## International Development Context:
 
 **Profile Language Patterns:**
@@ -247,8 +354,8 @@ def get_domain_context(domain: str) -> str:
 "M&E" → Monitoring and Evaluation, MEAL, "tracked indicators", "evaluated programs", logframe
 "WASH" → Water Sanitation, "water projects", "sanitation programs", borehole, water supply
 """,
-        
-        "finance": """
+    
+    "finance": """
 ## Finance Context:
 
 **Profile Language Patterns:**
@@ -272,50 +379,173 @@ def get_domain_context(domain: str) -> str:
 "Financial Modeling" → DCF, valuation, "built models", Excel, "financial analysis"
 "Risk Management" → "risk analysis", VaR, "stress testing", "risk assessment"
 """
-    }
-    
-    return contexts.get(domain, "")
+}
+
+
+def get_domain_context(domain: str) -> str:
+    """Get domain-specific search context and examples"""
+    return DOMAIN_CONTEXTS.get(domain, "")
 
 
 # ---------- IMPROVED PROMPT ----------
 
-def create_improved_prompt(job_text: str, platform: str, domain: str) -> str:
-    """
-    Create context-aware prompt for better search string generation
-    """
-    
-    domain_context = get_domain_context(domain) if domain != "auto_detect" else ""
-    
-    prompt = f"""You are an expert recruiter who creates EFFECTIVE search strings that actually return results.
+# Per-platform slices of the OUTPUT FORMAT block; a prompt only asks for the
+# searches of the platform it targets.
+def _search_tiers(*tiers) -> dict:
+    """Schema block for the four search tiers: (tier, search hint, rationale, estimate)"""
+    return {
+        tier: {"search": search, "rationale": rationale, "estimated_results": estimate}
+        for tier, search, rationale, estimate in tiers
+    }
 
-# CRITICAL PHILOSOPHY: SIMPLER IS BETTER
 
-The biggest mistake in Boolean search is over-engineering. Each restriction cuts results by 50-80%.
+SEARCHES_SCHEMA = {
+    "linkedin": {
+        "linkedinSearches": _search_tiers(
+            ("broad", "Search string with 1-2 AND operators max", "Why this structure", "300-1000"),
+            ("primary", "Search string with 2-3 AND operators max", "Why this structure", "100-500"),
+            ("focused", "Search string with 3-4 AND operators max", "Why this structure", "50-200"),
+            ("ultra_specific", "Kitchen sink search", "For perfect matches only", "10-50"),
+        )
+    },
+    "developmentaid": {
+        "developmentaidSearches": _search_tiers(
+            ("broad", "Simple sector search with boost", "Why this structure", "200-800"),
+            ("primary", "Sector + donor/geography", "Why this structure", "80-300"),
+            ("focused", "Sector + donor + specific skills", "Why this structure", "30-150"),
+            ("ultra_specific", "All criteria with wildcards", "For exact matches", "10-50"),
+        )
+    },
+}
+
+
+def _output_schema(platform: str) -> dict:
+    """Example JSON the model must return; searchStrategy comes early so the preview can show it"""
+    schema = {
+        "domain_detected": "Detected domain/industry",
+        "searchStrategy": "2-3 sentences explaining the overall approach",
+        "analysis": {
+            "coreSkills": ["2-3 absolute must-haves"],
+            "secondarySkills": ["3-5 nice-to-haves"],
+            "jobTitles": ["5-10 title variations"],
+            "seniorityLevel": "entry|mid|senior|lead",
+            "keyEvidence": ["Tools/outputs that prove skills"]
+        },
+        "contextualSynonyms": {
+            "SkillName": {
+                "formal": ["Professional terms"],
+                "profile_language": ["How people describe doing it"],
+                "evidence": ["Tools/outputs"],
+                "combined_or_clause": "(term1 OR term2 OR term3 OR tool1 OR tool2)"
+            }
+        },
+    }
+    schema.update(SEARCHES_SCHEMA[platform])
+    schema["warnings"] = ["Any concerns about search difficulty"]
+    schema["manualReviewTips"] = ["What to look for when reviewing results"]
+    return schema
+
+
+# Serialized once at import, compact to save prompt tokens; the schema text is
+# byte-identical on every request
+OUTPUT_FORMATS = {
+    platform: orjson.dumps(_output_schema(platform)).decode()
+    for platform in SEARCHES_SCHEMA
+}
+
 
-## LinkedIn Reality Check:
+# Per-request user message, filled with str.format
+USER_PROMPT_TEMPLATE = """# OUTPUT FORMAT (JSON):
+
+{output_format}
+{domain_context}
+
+# CONFIGURATION:
+- Platform: {platform}
+- Domain: {domain}
+- Include location: {include_location}
+- Include seniority: {include_seniority}
+
+# JOB DESCRIPTION:
+{job_text}"""
+
+
+# Job descriptions are cut to this many tokens before they go into the prompt;
+# MAX_JOB_CHARS is the cut used when no tokenizer can be loaded
+MAX_JOB_TOKENS = 3500
+MAX_JOB_CHARS = 15000
+
+
+@st.cache_resource
+def get_encoder(model: str):
+    """Tokenizer for the selected model, loaded once per process; None if unavailable"""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The BPE file is downloaded on first use, which fails where the host is
+        # blocked. None is cached too, so the download isn't retried per request.
+        logger.warning("Could not load tokenizer for %s, truncating by characters: %s", model, e)
+        return None
+
+
+def truncate_job_text(job_text: str, model: str) -> str:
+    """Trim the job description to MAX_JOB_TOKENS tokens of the given model"""
+    # Byte-level BPE tokens cover at least one UTF-8 byte each, so texts this
+    # short never need encoding (a single character can be several tokens)
+    if len(job_text.encode("utf-8")) <= MAX_JOB_TOKENS:
+        return job_text
+    
+    enc = get_encoder(model)
+    if enc is None:
+        return job_text[:MAX_JOB_CHARS]
+    
+    # Pasted text is data: "<|endoftext|>" and the like are encoded as plain text
+    tokens = enc.encode(job_text, disallowed_special=())
+    if len(tokens) <= MAX_JOB_TOKENS:
+        return job_text
+    return enc.decode(tokens[:MAX_JOB_TOKENS])
+
+
+# Static instructions, sent verbatim as the system message. Everything that
+# varies per request lives in the user message, so each platform's system
+# prompt stays byte-identical across calls and OpenAI's automatic prompt
+# caching applies. Only the target platform's rules are included.
+# OpenAI only caches prefixes of 1024+ tokens: with o200k_base, each system
+# prompt plus the output schema opening the user message is ~1100 tokens.
+PLATFORM_GUIDANCE = {
+    "linkedin": {
+        "reality_check": """## LinkedIn Reality Check:
 - Each AND operator = 50-70% reduction in results
 - title: operator = 80% reduction in results  
 - Exact phrases = 40% reduction in results
 - Perfect match search with 5 ANDs = 0-20 results ❌
-- Simple search with 2 ANDs = 200-500 results ✅
-
-## DevelopmentAid Reality Check:
-- Focus on sector keywords and donor experience
-- Use boost operator (^) to prioritize key terms
-- Include geographic context
-- Broader searches work better than narrow ones
-
-# PLATFORM SYNTAX:
-
-## LinkedIn Recruiter:
+- Simple search with 2 ANDs = 200-500 results ✅""",
+        "syntax": """## LinkedIn Recruiter:
 - AND, OR, NOT (must be UPPERCASE)
 - Quotes for exact phrases: "Machine Learning"
 - Parentheses for grouping: (Python OR Java)
 - title: operator (use sparingly!)
 - Maximum 3 AND operators in primary search
 - Maximum 5 AND operators even in focused search
-
-## DevelopmentAid:
+- Each OR group: 3-5 variations mixing formal terms, profile language and tools""",
+        "formula": """**LinkedIn:**
+```
+Broad: (skill1 OR skill2 OR skill3)
+Primary: (skill1 OR skill2 OR skill3) AND (role1 OR role2 OR role3)
+Focused: (skill1 OR skill2 OR skill3) AND (role1 OR role2 OR role3) AND (evidence1 OR evidence2)
+Ultra_specific: Add location, seniority, or more evidence
+```""",
+    },
+    "developmentaid": {
+        "reality_check": """## DevelopmentAid Reality Check:
+- Focus on sector keywords and donor experience
+- Use boost operator (^) to prioritize key terms
+- Include geographic context
+- Broader searches work better than narrow ones""",
+        "syntax": """## DevelopmentAid:
 - AND: `+` or space (space is assumed AND)
 - OR: `|` or comma `,`
 - NOT: `-` (minus)
@@ -324,12 +554,33 @@ The biggest mistake in Boolean search is over-engineering. Each restriction cuts
 - Wildcard: `financ*` (finds finance, financial, financing)
 - Boost: `term^5` (must use with OR: `(water)^10 | sanitation`)
 - Example: `(WASH|"water sanitation")^10 | (M&E)^8 + (USAID|"World Bank")`
+- Never use AND/OR/NOT; boost key sector terms and add donor/geography context""",
+        "formula": """**DevelopmentAid:**
+```
+Broad: (sector1|sector2)^10 | (sector3)^8
+Primary: (sector1|sector2)^10 | (sector3) + (donor1|donor2)
+Focused: (sector1|sector2)^10 + (donor1|donor2) + (geography1|geography2)
+Ultra_specific: Add specific technical skills or certifications
+```""",
+    },
+}
+
+SYSTEM_PROMPT_TEMPLATE = """You are an expert recruiter who creates EFFECTIVE search strings that actually return results.
+
+# CRITICAL PHILOSOPHY: SIMPLER IS BETTER
+
+The biggest mistake in Boolean search is over-engineering. Each restriction cuts results by 50-80%.
+
+{reality_check}
+
+# PLATFORM SYNTAX:
+
+{syntax}
 
 # YOUR TASK:
 
 Analyze the job description and create SIMPLE, EFFECTIVE searches.
-
-{domain_context}
+The user message gives the JSON output format, domain context, configuration and job description.
 
 ## Step 1: Extract Core Requirements
 
@@ -363,128 +614,348 @@ Generate 4 search tiers:
 
 ## Search Building Formula:
 
-**LinkedIn:**
-```
-Broad: (skill1 OR skill2 OR skill3)
-Primary: (skill1 OR skill2 OR skill3) AND (role1 OR role2 OR role3)
-Focused: (skill1 OR skill2 OR skill3) AND (role1 OR role2 OR role3) AND (evidence1 OR evidence2)
-Ultra_specific: Add location, seniority, or more evidence
-```
+{formula}
 
-**DevelopmentAid:**
-```
-Broad: (sector1|sector2)^10 | (sector3)^8
-Primary: (sector1|sector2)^10 | (sector3) + (donor1|donor2)
-Focused: (sector1|sector2)^10 + (donor1|donor2) + (geography1|geography2)
-Ultra_specific: Add specific technical skills or certifications
-```
+# COMMON MISTAKES TO AVOID:
 
-# CONFIGURATION:
-- Platform: {platform}
-- Domain: {domain}
-- Include location: {include_location}
-- Include seniority: {include_seniority}
+- Requiring every listed skill with AND; most strong candidates mention only a few of them
+- Using the title operator in broad or primary searches, where it removes most good profiles
+- Quoting single words; quotes are only needed for multi-word phrases
+- Packing more than five terms into one OR group, which makes searches hard to adjust
+- Searching for soft skills such as "team player" or "communication", which every profile claims
+- Relying on the exact job title from the posting; employers name the same role in many ways
+- Adding company names, degrees or years of experience unless the job truly requires them
 
-# JOB DESCRIPTION:
-{job_text[:15000]}
-
-# OUTPUT FORMAT (JSON):
-
-{{
-  "domain_detected": "Detected domain/industry",
-  
-  "analysis": {{
-    "coreSkills": ["2-3 absolute must-haves"],
-    "secondarySkills": ["3-5 nice-to-haves"],
-    "jobTitles": ["5-10 title variations"],
-    "seniorityLevel": "entry|mid|senior|lead",
-    "keyEvidence": ["Tools/outputs that prove skills"]
-  }},
-  
-  "contextualSynonyms": {{
-    "SkillName": {{
-      "formal": ["Professional terms"],
-      "profile_language": ["How people describe doing it"],
-      "evidence": ["Tools/outputs"],
-      "combined_or_clause": "(term1 OR term2 OR term3 OR tool1 OR tool2)"
-    }}
-  }},
-  
-  "linkedinSearches": {{
-    "broad": {{
-      "search": "Search string with 1-2 AND operators max",
-      "rationale": "Why this structure",
-      "estimated_results": "300-1000"
-    }},
-    "primary": {{
-      "search": "Search string with 2-3 AND operators max",
-      "rationale": "Why this structure", 
-      "estimated_results": "100-500"
-    }},
-    "focused": {{
-      "search": "Search string with 3-4 AND operators max",
-      "rationale": "Why this structure",
-      "estimated_results": "50-200"
-    }},
-    "ultra_specific": {{
-      "search": "Kitchen sink search",
-      "rationale": "For perfect matches only",
-      "estimated_results": "10-50"
-    }}
-  }},
-  
-  "developmentaidSearches": {{
-    "broad": {{
-      "search": "Simple sector search with boost",
-      "rationale": "Why this structure",
-      "estimated_results": "200-800"
-    }},
-    "primary": {{
-      "search": "Sector + donor/geography",
-      "rationale": "Why this structure",
-      "estimated_results": "80-300"
-    }},
-    "focused": {{
-      "search": "Sector + donor + specific skills",
-      "rationale": "Why this structure",
-      "estimated_results": "30-150"
-    }},
-    "ultra_specific": {{
-      "search": "All criteria with wildcards",
-      "rationale": "For exact matches",
-      "estimated_results": "10-50"
-    }}
-  }},
-  
-  "searchStrategy": "2-3 sentences explaining the overall approach",
-  "warnings": ["Any concerns about search difficulty"],
-  "manualReviewTips": ["What to look for when reviewing results"]
-}}
-
-# QUALITY CHECKLIST:
-
-LinkedIn:
-✓ Maximum 3 AND operators in primary search
-✓ Each OR group has 3-5 variations
-✓ Includes both formal terms and profile language
-✓ Evidence terms (tools) included
-✓ Avoid or minimize title: operator usage
-
-DevelopmentAid:
-✓ Uses correct syntax: +, |, -, not AND/OR/NOT
-✓ Boost operator (^) used with key terms
-✓ Includes sector-specific terminology
-✓ Includes donor/geography context
-✓ Wildcard (*) used for term variations
-
-Generate searches that WILL RETURN RESULTS, not perfect theoretical matches!"""
-
-    return prompt
+Generate searches that WILL RETURN RESULTS, not perfect theoretical matches!
+Keep the JSON output under 1200 tokens."""
+
+
+# "both" is sent as one request per platform, so only single-platform prompts exist
+SYSTEM_PROMPTS = {
+    platform: SYSTEM_PROMPT_TEMPLATE.format(**guidance)
+    for platform, guidance in PLATFORM_GUIDANCE.items()
+}
+
+
+def create_prompt_for_platform(job_text: str, platform: str, domain: str,
+                               include_location: bool, include_seniority: bool) -> tuple:
+    """
+    Create the (system, user) prompt pair for one request.
+    platform is "linkedin" or "developmentaid"; only the matching rules and
+    searches are included.
+    """
+    
+    domain_context = get_domain_context(domain) if domain != "auto_detect" else ""
+    
+    user_prompt = USER_PROMPT_TEMPLATE.format(
+        output_format=OUTPUT_FORMATS[platform],
+        domain_context=domain_context,
+        platform=platform,
+        domain=domain,
+        include_location=include_location,
+        include_seniority=include_seniority,
+        job_text=job_text
+    )
+    return SYSTEM_PROMPTS[platform], user_prompt
 
 
 # ---------- ANALYZE FUNCTION ----------
 
-def analyze_job_description(job_text: str, platform: str, domain: str):
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Analyses on disk older than this are requested again; once the directory
+# grows past DISK_CACHE_MAX_BYTES the oldest files are deleted
+DISK_CACHE_TTL = 7 * 24 * 3600
+DISK_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Output budget per request; each request covers a single platform.
+# A response cut off at MAX_TOKENS is retried once with RETRY_MAX_TOKENS.
+MAX_TOKENS = 1200
+RETRY_MAX_TOKENS = 2500
+
+# Redraw the streaming preview every N deltas rather than on each one
+STREAM_RENDER_EVERY = 20
+
+# Streamed sections whose search strings are shown as soon as each one is complete
+STREAM_SEARCH_LABELS = {
+    "linkedinSearches": "LinkedIn",
+    "developmentaidSearches": "DevelopmentAid",
+}
+
+
+class StreamPreview:
+    """
+    Live view of one streaming analysis: the strategy and every finished search
+    string, plus the tail of the raw JSON. Deltas are fed to an incremental ijson
+    parser, so each value is rendered as soon as its closing quote arrives.
+    Create it inside cached_analyze so st.cache_data can replay it.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.searches = []
+        self.events = ijson.sendable_list()
+        self.parser = ijson.parse_coro(self.events)
+        self.strategy_box = st.empty()
+        self.searches_box = st.empty()
+        self.tail_box = st.empty()
+
+    def add(self, delta: str):
+        self.parts.append(delta)
+        
+        if self.parser is not None:
+            try:
+                self.parser.send(delta.encode("utf-8"))
+            except ijson.JSONError:
+                # Malformed JSON; stop previewing and let the final parse report it
+                self.parser = None
+            else:
+                self._show_new_values()
+        
+        if len(self.parts) % STREAM_RENDER_EVERY == 0:
+            self.tail_box.code("".join(self.parts)[-500:], language="json")
+
+    def _show_new_values(self):
+        found = False
+        for prefix, event, value in self.events:
+            if prefix == "searchStrategy" and event == "string":
+                self.strategy_box.markdown(f"**📋 Strategy:** {value}")
+                continue
+            section, _, rest = prefix.partition(".")
+            if event == "string" and section in STREAM_SEARCH_LABELS and rest.endswith(".search"):
+                tier = rest[:-len(".search")]
+                self.searches.append((f"{STREAM_SEARCH_LABELS[section]} - {tier.replace('_', ' ').title()}", value))
+                found = True
+        del self.events[:]
+        
+        if found:
+            with self.searches_box.container():
+                for label, search in self.searches:
+                    st.caption(label)
+                    st.code(search, language="text")
+
+    def finish(self) -> str:
+        """Clear the preview and return the full response text"""
+        self.strategy_box.empty()
+        self.searches_box.empty()
+        self.tail_box.empty()
+        return "".join(self.parts)
+
+
+def _completion_kwargs(model: str, prompt: tuple, max_tokens: int) -> dict:
+    """Arguments shared by the sync and async streaming requests"""
+    system_prompt, user_prompt = prompt
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ],
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "max_tokens": max_tokens,
+        "seed": 42,
+        "response_format": {"type": "json_object"},
+        "stream": True,
+        # Adds a final chunk with token usage, including prompt-cache hits
+        "stream_options": {"include_usage": True}
+    }
+
+
+def _log_usage(model: str, usage):
+    """Log token usage so prompt-cache hit rates can be checked"""
+    details = usage.prompt_tokens_details
+    cached_tokens = (details.cached_tokens or 0) if details else 0
+    logger.info(
+        "%s usage: %d prompt tokens (%d cached), %d completion tokens",
+        model, usage.prompt_tokens, cached_tokens, usage.completion_tokens
+    )
+
+
+def _log_truncated(model: str, max_tokens: int):
+    logger.warning("%s output hit max_tokens=%d; retrying with %d", model, max_tokens, RETRY_MAX_TOKENS)
+
+
+def _stream_analysis(client: OpenAI, model: str, prompt: tuple) -> dict:
+    """Stream one analysis, previewing it as it arrives; retried once if truncated"""
+    for max_tokens in (MAX_TOKENS, RETRY_MAX_TOKENS):
+        stream = client.chat.completions.create(**_completion_kwargs(model, prompt, max_tokens))
+
+        preview = StreamPreview()
+        finish_reason = None
+        for chunk in stream:
+            if chunk.usage:
+                _log_usage(model, chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            if choice.delta.content:
+                preview.add(choice.delta.content)
+
+        text = preview.finish()
+        if finish_reason != "length" or max_tokens == RETRY_MAX_TOKENS:
+            break
+        _log_truncated(model, max_tokens)
+
+    return orjson.loads(text)
+
+
+async def _stream_analysis_async(client: AsyncOpenAI, model: str, prompt: tuple) -> dict:
+    """Async twin of _stream_analysis, so several platforms can be generated at once"""
+    for max_tokens in (MAX_TOKENS, RETRY_MAX_TOKENS):
+        stream = await client.chat.completions.create(**_completion_kwargs(model, prompt, max_tokens))
+
+        preview = StreamPreview()
+        finish_reason = None
+        async for chunk in stream:
+            if chunk.usage:
+                _log_usage(model, chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            if choice.delta.content:
+                preview.add(choice.delta.content)
+
+        text = preview.finish()
+        if finish_reason != "length" or max_tokens == RETRY_MAX_TOKENS:
+            break
+        _log_truncated(model, max_tokens)
+
+    return orjson.loads(text)
+
+
+async def _stream_analyses(model: str, prompts: list) -> list:
+    """Run several analyses concurrently on a short-lived async client"""
+    # Not cached like get_openai_client: an async client is bound to the event
+    # loop it first runs on, and asyncio.run() creates a new loop every call.
+    http_client = httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    async with AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=OPENAI_MAX_RETRIES) as client:
+        return await asyncio.gather(*(_stream_analysis_async(client, model, prompt) for prompt in prompts))
+
+
+def _read_disk_cache(cache_key: str):
+    """Cached analysis for cache_key, or None if missing, expired or unreadable"""
+    cache_path = os.path.join(CACHE_DIR, f"{cache_key}.json")
+    try:
+        if time.time() - os.path.getmtime(cache_path) >= DISK_CACHE_TTL:
+            return None
+        with open(cache_path, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        # A damaged file is treated as a miss and rewritten after the request
+        return None
+
+
+def _write_disk_cache(cache_key: str, result: dict):
+    """Write atomically: readers in other sessions never see a half-written file"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(result))
+        os.replace(tmp_path, os.path.join(CACHE_DIR, f"{cache_key}.json"))
+    except OSError as e:
+        # The disk cache is an optimisation; the result is still returned
+        logger.warning("Could not write analysis cache %s: %s", cache_key, e)
+
+
+def _prune_disk_cache():
+    """Delete expired entries, then the oldest ones until under DISK_CACHE_MAX_BYTES"""
+    try:
+        entries = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(CACHE_DIR) if e.is_file()]
+    except OSError:
+        return
+    
+    expired_before = time.time() - DISK_CACHE_TTL
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if mtime >= expired_before and total <= DISK_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def cached_analyze(cache_keys: tuple, model: str, _prompts: tuple) -> list:
+    """
+    Run one analysis per (system, user) prompt pair, memoized in memory and on disk.
+    cache_keys holds a digest of (model, prompt) for each prompt, so the prompts
+    themselves are not re-hashed. Uncached prompts are requested concurrently.
+    Disk entries expire after DISK_CACHE_TTL.
+    Streaming placeholders are created in here (not passed in) so st.cache_data can replay them.
+    """
+    results = [_read_disk_cache(cache_key) for cache_key in cache_keys]
+
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    if len(pending) == 1:
+        results[pending[0]] = _stream_analysis(get_openai_client(api_key), model, _prompts[pending[0]])
+    elif pending:
+        fetched = asyncio.run(_stream_analyses(model, [_prompts[i] for i in pending]))
+        for i, result in zip(pending, fetched):
+            results[i] = result
+
+    for i in pending:
+        _write_disk_cache(cache_keys[i], results[i])
+    if pending:
+        _prune_disk_cache()
+
+    return results
+
+
+def merge_platform_analyses(linkedin: dict, developmentaid: dict) -> dict:
+    """Combine the per-platform analyses into the single shape the display expects"""
+    merged = dict(linkedin)
+    merged["developmentaidSearches"] = developmentaid.get("developmentaidSearches", {})
+    
+    for key in ("warnings", "manualReviewTips"):
+        merged[key] = _merge_lists(linkedin.get(key), developmentaid.get(key))
+    
+    return merged
+
+
+def _merge_lists(*values) -> list:
+    """
+    Concatenate list fields from several responses, dropping repeats in order.
+    JSON mode doesn't enforce the schema, so a bare string is treated as a
+    one-item list and unhashable items (objects, lists) are kept as they are.
+    """
+    merged, seen = [], set()
+    for value in values:
+        items = value if isinstance(value, list) else [value] if value else []
+        for item in items:
+            if isinstance(item, Hashable):
+                if item in seen:
+                    continue
+                seen.add(item)
+            merged.append(item)
+    return merged
+
+
+# Punctuation dropped when normalizing job text; + and # are kept for C++, C#, etc.
+_RE_JOB_PUNCTUATION = re.compile(r"[^\w\s+#]+")
+_RE_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_job_text(job_text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace for cache keys"""
+    text = _RE_JOB_PUNCTUATION.sub(" ", job_text.lower())
+    return _RE_WHITESPACE.sub(" ", text).strip()
+
+
+def analyze_job_description(job_text: str, platform: str, domain: str, model: str,
+                            include_location: bool, include_seniority: bool):
     """Analyze job description and generate platform-specific searches"""
     
     if not api_key:
@@ -492,73 +963,146 @@ def analyze_job_description(job_text: str, platform: str, domain: str):
         return None
     
     try:
-        client = OpenAI(api_key=api_key)
+        job_text = truncate_job_text(job_text, model)
         
-        prompt = create_improved_prompt(job_text, platform, domain)
-        
-        with st.spinner("🧠 Analyzing job description and generating optimized searches..."):
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert recruiter specializing in creating effective Boolean search strings. You understand the critical importance of simple searches that return results."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.2,
-                max_tokens=4000,
-                response_format={"type": "json_object"}
+        # "both" is split into one request per platform so they can run in parallel
+        targets = ["linkedin", "developmentaid"] if platform == "both" else [platform]
+        prompts = tuple(
+            create_prompt_for_platform(job_text, target, domain, include_location, include_seniority)
+            for target in targets
+        )
+        # Keyed on the prompt built from the normalized text, so pastes of the
+        # same job that differ only in case, spacing or punctuation share an entry
+        normalized_text = normalize_job_text(job_text)
+        cache_keys = tuple(
+            hashlib.blake2b(f"{model}\n{system_prompt}\n{user_prompt}".encode(), digest_size=16).hexdigest()
+            for system_prompt, user_prompt in (
+                create_prompt_for_platform(normalized_text, target, domain, include_location, include_seniority)
+                for target in targets
             )
+        )
         
-        content = response.choices[0].message.content
+        with st.spinner("🧠 Analyzing job description and generating optimized searches..."):
+            results = cached_analyze(cache_keys, model, prompts)
         
-        try:
-            result = json.loads(content)
-            st.session_state.analysis_results = result
-            st.session_state.domain_detected = result.get("domain_detected", domain)
-            return result
-        except json.JSONDecodeError:
-            start = content.find("{")
-            end = content.rfind("}")
-            if start != -1 and end != -1:
-                result = json.loads(content[start:end+1])
-                st.session_state.analysis_results = result
-                st.session_state.domain_detected = result.get("domain_detected", domain)
-                return result
-            else:
-                st.error("⚠️ Failed to parse JSON from AI response.")
-                with st.expander("See raw response"):
-                    st.code(content)
-                return None
+        return merge_platform_analyses(*results) if platform == "both" else results[0]
+    
+    except orjson.JSONDecodeError as e:
+        st.error("⚠️ Failed to parse JSON from AI response.")
+        with st.expander("See raw response"):
+            st.code(e.doc)
+        return None
+    
+    # Raised only once the client's own retries are used up
+    except RateLimitError as e:
+        # Also a 429, but waiting won't help until the account is topped up
+        if e.code == "insufficient_quota":
+            st.error("💳 Your OpenAI account has run out of quota. "
+                     "Check your plan and billing details at platform.openai.com, then try again.")
+        else:
+            st.error(f"⏳ OpenAI rate limit reached after {OPENAI_MAX_RETRIES} retries. "
+                     f"Wait a minute and try again. ({e.message})")
+        return None
+    
+    except APIConnectionError:
+        st.error(f"🔌 Could not reach OpenAI after {OPENAI_MAX_RETRIES} retries. "
+                 "Check your network connection and try again.")
+        return None
+    
+    except APIStatusError as e:
+        st.error(f"❌ OpenAI returned an error ({e.status_code}): {e.message}")
+        return None
     
     except Exception as e:
         st.error(f"❌ Error: {str(e)}")
         return None
 
 
+# ---------- EXPORTS ----------
+
+def build_exports(analysis: dict, domain_detected: str) -> tuple:
+    """Serialize the analysis for the JSON and text download buttons"""
+    json_str = orjson.dumps(analysis, option=orjson.OPT_INDENT_2).decode()
+    
+    parts = [f"""# Job Search Strings Generated
+
+## Strategy
+{analysis.get('searchStrategy', '')}
+
+## Domain: {domain_detected or 'General'}
+
+"""]
+    
+    if "linkedinSearches" in analysis:
+        parts.append("\n## LinkedIn Recruiter Searches\n\n")
+        for key, search_data in analysis["linkedinSearches"].items():
+            search = search_data.get("search", search_data) if isinstance(search_data, dict) else search_data
+            parts.append(f"### {key.replace('_', ' ').title()}\n{search}\n\n")
+    
+    if "developmentaidSearches" in analysis:
+        parts.append("\n## DevelopmentAid Searches\n\n")
+        for key, search_data in analysis["developmentaidSearches"].items():
+            search = search_data.get("search", search_data) if isinstance(search_data, dict) else search_data
+            parts.append(f"### {key.replace('_', ' ').title()}\n{search}\n\n")
+    
+    if analysis.get("manualReviewTips"):
+        parts.append("\n## Manual Review Tips\n")
+        for tip in analysis["manualReviewTips"]:
+            parts.append(f"- {tip}\n")
+    
+    return json_str, "".join(parts)
+
+
 # ---------- GENERATE BUTTON ----------
 
-if st.button("🔍 Generate Optimized Search Strings", type="primary"):
-    if not api_key:
-        st.error("Please enter your OpenAI API key.")
-    elif not job_description.strip():
+if submitted:
+    if not job_description.strip():
         st.error("Please upload or paste a job description.")
     else:
         # Detect domain if auto
         detected_domain = domain if domain != "auto_detect" else "general"
         
+        # Short descriptions with enough known skills skip the model, so no API key is needed
+        analysis = local_analyze(job_description, platform, detected_domain, include_seniority) if use_local else None
+        
         # Generate analysis
-        analysis = analyze_job_description(job_description, platform, detected_domain)
+        if analysis is None and not api_key:
+            st.error("Please enter your OpenAI API key.")
+        elif analysis is None:
+            analysis = analyze_job_description(
+                job_description, platform, detected_domain, model, include_location, include_seniority
+            )
+        
+        # Keep the previous results on failure; the error is already shown
+        if analysis:
+            st.session_state.analysis_results = analysis
+            st.session_state.domain_detected = analysis.get("domain_detected", detected_domain)
+            st.session_state.exports = build_exports(analysis, st.session_state.domain_detected)
 
 
 # ---------- DISPLAY RESULTS ----------
 
-if st.session_state.analysis_results:
-    analysis = st.session_state.analysis_results
+SEARCH_COLUMNS = {
+    "Search": st.column_config.TextColumn("Search", width="large"),
+    "Link": st.column_config.LinkColumn("Link", display_text="🔍 Search Now"),
+    "Rationale": st.column_config.TextColumn("Rationale", width="medium"),
+}
+
+
+def _unpack_search(search_data):
+    """Return (search, rationale, estimated_results); the model may emit a bare string."""
+    if isinstance(search_data, dict):
+        return (
+            search_data.get("search", ""),
+            search_data.get("rationale", ""),
+            search_data.get("estimated_results", ""),
+        )
+    return search_data, "", ""
+
+
+@st.fragment
+def render_results(analysis: dict, platform: str):
+    """Render the stored analysis; widgets in here only rerun this fragment"""
     
     st.success("✅ Analysis complete!")
     
@@ -566,6 +1110,7 @@ if st.session_state.analysis_results:
     if st.button("🗑️ Clear Results & Start New Search"):
         st.session_state.analysis_results = None
         st.session_state.domain_detected = None
+        st.session_state.exports = None
         st.rerun()
     
     # Show domain detection
@@ -635,63 +1180,34 @@ if st.session_state.analysis_results:
     if "linkedinSearches" in analysis and platform in ["both", "linkedin"]:
         st.header("🔗 LinkedIn Recruiter Search Strings")
         
-        searches = analysis["linkedinSearches"]
-        
-        for key, search_data in searches.items():
-            # Handle both dict and string formats
-            if isinstance(search_data, dict):
-                search_string = search_data.get("search", "")
-                rationale = search_data.get("rationale", "")
-                estimated = search_data.get("estimated_results", "")
-            else:
-                search_string = search_data
-                rationale = ""
-                estimated = ""
-            
-            st.subheader(f"LinkedIn - {key.replace('_', ' ').title()}")
-            
-            # Validate and estimate
-            col1, col2 = st.columns([3, 1])
+        rows, notes = [], []
+        for key, search_data in analysis["linkedinSearches"].items():
+            search_string, rationale, _ = _unpack_search(search_data)
+            tier = key.replace('_', ' ').title()
             
-            with col1:
-                with st.expander("Click to view and copy", expanded=True):
-                    st.code(search_string, language="text")
-                    
-                    if rationale:
-                        st.caption(f"**Rationale:** {rationale}")
-            
-            with col2:
-                # Validation
-                validation = validate_linkedin_search(search_string)
-                
-                if validation["valid"]:
-                    st.success("✅ Valid")
-                else:
-                    st.error("❌ Issues")
-                    for issue in validation["issues"]:
-                        st.warning(f"⚠️ {issue}")
-                
-                # Warnings
-                for warning in validation.get("warnings", []):
-                    st.warning(f"⚠️ {warning}")
-                
-                # Estimation
-                estimate = estimate_linkedin_results(search_string)
-                st.metric("Est. Results", estimate["estimated_range"])
-                st.caption(estimate["quality"])
-                
-                # Stats
-                st.caption(f"AND: {validation['and_count']}")
-                st.caption(f"OR: {validation['or_count']}")
-                st.caption(f"Length: {validation['length']}")
-                
-                # Direct search link
-                import urllib.parse
-                encoded_query = urllib.parse.quote(search_string)
-                search_url = f"https://www.linkedin.com/search/results/people/?keywords={encoded_query}"
-                st.markdown(f"[🔍 Search Now]({search_url})")
+            validation = validate_linkedin_search(search_string)
+            estimate = estimate_linkedin_results(search_string)
+            notes += [(tier, issue) for issue in validation.issues + validation.warnings]
             
-            st.markdown("---")
+            rows.append({
+                "Tier": tier,
+                "Search": search_string,
+                "Status": "✅ Valid" if validation.valid else "❌ Issues",
+                "Est. Results": estimate.estimated_range,
+                "Quality": estimate.quality,
+                "AND": validation.and_count,
+                "OR": validation.or_count,
+                "Length": validation.length,
+                "Link": f"https://www.linkedin.com/search/results/people/?keywords={quote(search_string)}",
+                "Rationale": rationale,
+            })
+        
+        # One dataframe per platform instead of a block of widgets per tier
+        st.dataframe(rows, hide_index=True, width="stretch", column_config=SEARCH_COLUMNS)
+        for tier, note in notes:
+            st.warning(f"⚠️ **{tier}:** {note}")
+        
+        st.markdown("---")
     
     # DevelopmentAid searches
     if "developmentaidSearches" in analysis and platform in ["both", "developmentaid"]:
@@ -707,60 +1223,31 @@ if st.session_state.analysis_results:
         - `(term)^10` = boost operator (use with OR)
         """)
         
-        searches = analysis["developmentaidSearches"]
-        
-        for key, search_data in searches.items():
-            # Handle both dict and string formats
-            if isinstance(search_data, dict):
-                search_string = search_data.get("search", "")
-                rationale = search_data.get("rationale", "")
-                estimated = search_data.get("estimated_results", "")
-            else:
-                search_string = search_data
-                rationale = ""
-                estimated = ""
-            
-            st.subheader(f"DevelopmentAid - {key.replace('_', ' ').title()}")
-            
-            col1, col2 = st.columns([3, 1])
+        rows, notes = [], []
+        for key, search_data in analysis["developmentaidSearches"].items():
+            search_string, rationale, estimated = _unpack_search(search_data)
+            tier = key.replace('_', ' ').title()
             
-            with col1:
-                with st.expander("Click to view and copy", expanded=True):
-                    st.code(search_string, language="text")
-                    
-                    if rationale:
-                        st.caption(f"**Rationale:** {rationale}")
+            validation = validate_developmentaid_search(search_string)
+            notes += [(tier, issue) for issue in validation.issues + validation.warnings]
             
-            with col2:
-                # Validation
-                validation = validate_developmentaid_search(search_string)
-                
-                if validation["valid"]:
-                    st.success("✅ Valid")
-                else:
-                    st.error("❌ Issues")
-                    for issue in validation["issues"]:
-                        st.warning(f"⚠️ {issue}")
-                
-                # Warnings
-                for warning in validation.get("warnings", []):
-                    st.warning(f"⚠️ {warning}")
-                
-                # Stats
-                st.caption(f"AND (+): {validation['and_count']}")
-                st.caption(f"OR (|): {validation['or_count']}")
-                st.caption(f"NOT (-): {validation['not_count']}")
-                
-                if estimated:
-                    st.metric("Est. Results", estimated)
-                
-                # Direct search link
-                import urllib.parse
-                encoded_query = urllib.parse.quote(search_string)
-                search_url = f"https://www.developmentaid.org/search?q={encoded_query}"
-                st.markdown(f"[🔍 Search Now]({search_url})")
-            
-            st.markdown("---")
+            rows.append({
+                "Tier": tier,
+                "Search": search_string,
+                "Status": "✅ Valid" if validation.valid else "❌ Issues",
+                "Est. Results": estimated,
+                "AND": validation.and_count,
+                "OR": validation.or_count,
+                "NOT": validation.not_count,
+                "Link": f"https://www.developmentaid.org/search?q={quote(search_string)}",
+                "Rationale": rationale,
+            })
+        
+        st.dataframe(rows, hide_index=True, width="stretch", column_config=SEARCH_COLUMNS)
+        for tier, note in notes:
+            st.warning(f"⚠️ **{tier}:** {note}")
+        
+        st.markdown("---")
     
     # Tips and warnings
     if analysis.get("warnings") or analysis.get("manualReviewTips"):
@@ -782,9 +1269,10 @@ if st.session_state.analysis_results:
     
     col1, col2 = st.columns(2)
     
+    # Built once when the analysis arrives, not on every render
+    json_str, text_output = st.session_state.exports
+    
     with col1:
-        # JSON export
-        json_str = json.dumps(analysis, indent=2)
         st.download_button(
             label="📄 Download as JSON",
             data=json_str,
@@ -793,33 +1281,6 @@ if st.session_state.analysis_results:
         )
     
     with col2:
-        # Text export
-        text_output = f"""# Job Search Strings Generated
-
-## Strategy
-{analysis.get('searchStrategy', '')}
-
-## Domain: {st.session_state.domain_detected or 'General'}
-
-"""
-        
-        if "linkedinSearches" in analysis:
-            text_output += "\n## LinkedIn Recruiter Searches\n\n"
-            for key, search_data in analysis["linkedinSearches"].items():
-                search = search_data.get("search", search_data) if isinstance(search_data, dict) else search_data
-                text_output += f"### {key.replace('_', ' ').title()}\n{search}\n\n"
-        
-        if "developmentaidSearches" in analysis:
-            text_output += "\n## DevelopmentAid Searches\n\n"
-            for key, search_data in analysis["developmentaidSearches"].items():
-                search = search_data.get("search", search_data) if isinstance(search_data, dict) else search_data
-                text_output += f"### {key.replace('_', ' ').title()}\n{search}\n\n"
-        
-        if analysis.get("manualReviewTips"):
-            text_output += "\n## Manual Review Tips\n"
-            for tip in analysis["manualReviewTips"]:
-                text_output += f"- {tip}\n"
-        
         st.download_button(
             label="📄 Download as Text",
             data=text_output,
@@ -827,6 +1288,10 @@ if st.session_state.analysis_results:
             mime="text/plain"
         )
 
+
+if st.session_state.analysis_results:
+    render_results(st.session_state.analysis_results, platform)
+
 # ---------- FOOTER ----------
 st.markdown("---")
 st.caption("💡 **Pro Tip:** Start with 'broad' searches to gauge the candidate pool, then narrow down with 'primary' or 'focused' searches.")
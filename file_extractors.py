@@ -1,24 +1,42 @@
-from PyPDF2 import PdfReader
+import io
+import streamlit as st
+import pymupdf
 import mammoth
 
-def extract_text_from_file(uploaded_file):
-    file_type = uploaded_file.type
+DOCX_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+)
 
-    if file_type == "text/plain":
-        return uploaded_file.read().decode("utf-8")
 
-    elif file_type == "application/pdf":
-        reader = PdfReader(uploaded_file)
-        return "\n".join(
-            [page.extract_text() for page in reader.pages if page.extract_text()]
-        )
+def _extract_txt(file_bytes: bytes) -> str:
+    return file_bytes.decode("utf-8")
 
-    elif file_type in [
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    ]:
-        result = mammoth.extract_raw_text(uploaded_file)
-        return result.value
 
-    else:
+def _extract_pdf(file_bytes: bytes) -> str:
+    # sort=True orders text blocks top-to-bottom, left-to-right for multi-column layouts
+    with pymupdf.open(stream=file_bytes, filetype="pdf") as doc:
+        pages = [page.get_text("text", sort=True) for page in doc]
+    return "\n".join(text for text in pages if text)
+
+
+def _extract_docx(file_bytes: bytes) -> str:
+    # Raw text keeps table cell contents and is cheaper than any markup conversion
+    return mammoth.extract_raw_text(io.BytesIO(file_bytes)).value
+
+
+EXTRACTORS = {
+    "text/plain": _extract_txt,
+    "application/pdf": _extract_pdf,
+    **{file_type: _extract_docx for file_type in DOCX_TYPES},
+}
+
+
+# Takes bytes rather than the UploadedFile so Streamlit can hash the arguments;
+# each distinct upload is parsed once instead of on every rerun.
+@st.cache_data(show_spinner="Extracting text...", max_entries=32)
+def extract_text_from_file(file_bytes: bytes, file_type: str) -> str:
+    extractor = EXTRACTORS.get(file_type)
+    if extractor is None:
         return "Unsupported file type."
+    return extractor(file_bytes)
@@ -0,0 +1,183 @@
+import re
+from collections import Counter
+from typing import Optional
+
+# Only job descriptions shorter than this are analyzed locally
+LOCAL_MAX_CHARS = 500
+
+# Fewer recognised skills than this is too thin to build tiered searches from
+LOCAL_MIN_SKILLS = 3
+
+# Curated skills: name -> (domain, terms). The first term is the canonical one;
+# any term found in the text counts as the skill, and all of them form its OR clause.
+# Terms are matched case-sensitively and must not be everyday words ("excel",
+# "strategy", "agile"), which would turn ordinary prose into skills.
+KNOWN_SKILLS = {
+    "Python": ("software_engineering", ("Python", "Django", "Flask", "FastAPI")),
+    "JavaScript": ("software_engineering", ("JavaScript", "TypeScript", "Node.js", "React")),
+    "Java": ("software_engineering", ("Java", "Spring Boot", "Kotlin")),
+    "C#": ("software_engineering", ("C#", ".NET", "ASP.NET")),
+    "SQL": ("software_engineering", ("SQL", "PostgreSQL", "MySQL", "SQL Server")),
+    "Cloud": ("software_engineering", ("AWS", "Azure", "GCP", "Google Cloud")),
+    "DevOps": ("software_engineering", ("DevOps", "Docker", "Kubernetes", "CI/CD", "Terraform")),
+    "Machine Learning": ("software_engineering", ("Machine Learning", "Deep Learning", "PyTorch", "TensorFlow")),
+    "Agile": ("software_engineering", ("Scrum", "Kanban", "Agile Methodology")),
+    "Monitoring and Evaluation": ("international_development", ("Monitoring and Evaluation", "M&E", "MEAL", "Impact Evaluation")),
+    "Project Management": ("international_development", ("Project Management", "Programme Management", "PMP", "PRINCE2")),
+    "Grant Management": ("international_development", ("Grant Management", "Grants Management", "Proposal Writing")),
+    "Capacity Building": ("international_development", ("Capacity Building", "Capacity Development", "Training of Trainers")),
+    "Donor Relations": ("international_development", ("USAID", "World Bank", "European Union", "FCDO", "UNDP")),
+    "Public Health": ("healthcare", ("Public Health", "Epidemiology", "Global Health")),
+    "Clinical Care": ("healthcare", ("Clinical Practice", "Nursing", "Patient Care")),
+    "Financial Analysis": ("finance", ("Financial Analysis", "Financial Modelling", "Financial Modeling", "FP&A")),
+    "Accounting": ("finance", ("Accounting", "IFRS", "GAAP", "Financial Audit")),
+    "Risk Management": ("finance", ("Risk Management", "Regulatory Compliance", "AML")),
+    "Data Analysis": ("general", ("Data Analysis", "Power BI", "Tableau", "Microsoft Excel")),
+    "Stakeholder Management": ("consulting", ("Stakeholder Management", "Stakeholder Engagement", "Client Management")),
+    "Strategy": ("consulting", ("Business Strategy", "Business Analysis", "Management Consulting")),
+}
+
+# Word boundaries that also work for terms starting or ending in symbols (C#, .NET)
+_SKILL_PATTERNS = {
+    name: re.compile("|".join(rf"(?<![\w.#+]){re.escape(term)}(?![\w#+])" for term in terms))
+    for name, (_, terms) in KNOWN_SKILLS.items()
+}
+
+# Optional seniority word, up to three capitalised qualifiers, then a role noun
+_RE_TITLE = re.compile(
+    r"\b(?:((?i:senior|sr\.?|junior|jr\.?|lead|principal|head of|chief))\s+)?"
+    r"((?:[A-Z][\w&/.+#-]*\s+){0,3}"
+    r"(?i:Developer|Engineer|Manager|Analyst|Specialist|Officer|Consultant|Coordinator|"
+    r"Advisor|Adviser|Scientist|Designer|Architect|Expert|Director|Accountant))\b"
+)
+_RE_YEARS = re.compile(r"(\d+)\+?\s*(?:years|yrs)", re.IGNORECASE)
+
+SENIORITY_WORDS = {
+    "senior": "senior", "sr": "senior", "sr.": "senior",
+    "junior": "entry", "jr": "entry", "jr.": "entry",
+    "lead": "lead", "principal": "lead", "head of": "lead", "chief": "lead",
+}
+
+
+def _match_skills(job_text: str) -> dict:
+    """Known skill -> the term found for it, in order of first appearance"""
+    matches = [(name, pattern.search(job_text)) for name, pattern in _SKILL_PATTERNS.items()]
+    found = sorted((match.start(), name, match.group(0)) for name, match in matches if match)
+    return {name: term for _, name, term in found}
+
+
+def _detect_seniority(job_text: str, prefix: str) -> str:
+    if prefix:
+        return SENIORITY_WORDS[prefix.lower()]
+    years = [int(y) for y in _RE_YEARS.findall(job_text)]
+    if not years:
+        return "mid"
+    most = max(years)
+    return "senior" if most >= 7 else "mid" if most >= 3 else "entry"
+
+
+def _quote(term: str) -> str:
+    return f'"{term}"' if " " in term else term
+
+
+def _linkedin_or(terms) -> str:
+    return "(" + " OR ".join(_quote(t) for t in terms) + ")"
+
+
+def _developmentaid_or(terms) -> str:
+    return "(" + " | ".join(_quote(t) for t in terms) + ")"
+
+
+def _tiers(title_clause: str, skill_clauses: list, joiner: str, ultra_title: str) -> dict:
+    """Four tiers that add one required skill at a time"""
+    clauses = [title_clause] + skill_clauses
+    rationales = {
+        "broad": "Job title plus the first core skill",
+        "primary": "Job title plus two core skills",
+        "focused": "Job title plus three core skills",
+        "ultra_specific": "Exact title with all three core skills, for close matches only",
+    }
+    searches = {
+        "broad": joiner.join(clauses[:2]),
+        "primary": joiner.join(clauses[:3]),
+        "focused": joiner.join(clauses[:4]),
+        "ultra_specific": joiner.join([ultra_title] + skill_clauses[:3]),
+    }
+    return {tier: {"search": searches[tier], "rationale": rationales[tier]} for tier in searches}
+
+
+def local_analyze(job_text: str, platform: str, domain: str, include_seniority: bool) -> Optional[dict]:
+    """
+    Build the analysis for a short job description from keyword matches, without
+    calling the API. Returns None when the text is too long, names no job title,
+    or matches fewer than LOCAL_MIN_SKILLS known skills; the caller then falls
+    back to the model. The result has the same shape as a model response.
+    """
+    if len(job_text) >= LOCAL_MAX_CHARS:
+        return None
+
+    skills = _match_skills(job_text)
+    title_match = _RE_TITLE.search(job_text)
+    if len(skills) < LOCAL_MIN_SKILLS or not title_match:
+        return None
+
+    prefix = title_match.group(1) or ""
+    seniority = _detect_seniority(job_text, prefix)
+    titles = [" ".join(title_match.group(2).split())]
+    if include_seniority and prefix:
+        titles.insert(0, " ".join(title_match.group(0).split()))
+
+    if domain == "general":
+        domains = Counter(KNOWN_SKILLS[name][0] for name in skills)
+        domain = domains.most_common(1)[0][0]
+
+    core, secondary = list(skills)[:3], list(skills)[3:]
+    synonyms = {
+        name: {
+            "formal": [KNOWN_SKILLS[name][1][0]],
+            "profile_language": [],
+            "evidence": list(KNOWN_SKILLS[name][1][1:]),
+            "combined_or_clause": _linkedin_or(KNOWN_SKILLS[name][1]),
+        }
+        for name in skills
+    }
+
+    analysis = {
+        "domain_detected": domain,
+        "searchStrategy": (
+            f"Built locally from the job title and {len(skills)} recognised skills. "
+            "Each tier adds one more required core skill, from broad reach to close matches."
+        ),
+        "analysis": {
+            "coreSkills": core,
+            "secondarySkills": secondary,
+            "jobTitles": titles,
+            "seniorityLevel": seniority,
+            "keyEvidence": [term for name, term in skills.items() if term.lower() != name.lower()],
+        },
+        "contextualSynonyms": synonyms,
+        "warnings": [
+            "Generated locally by keyword matching; no synonyms beyond the built-in list were considered."
+        ],
+        "manualReviewTips": [
+            f"Check that profiles show hands-on {', '.join(core)} work, not just keywords",
+            "Paste a longer job description to get a full model-generated analysis",
+        ],
+    }
+
+    if platform in ["both", "linkedin"]:
+        analysis["linkedinSearches"] = _tiers(
+            _linkedin_or(titles),
+            [_linkedin_or(KNOWN_SKILLS[name][1]) for name in core],
+            " AND ",
+            f'title:"{titles[0]}"',
+        )
+    if platform in ["both", "developmentaid"]:
+        analysis["developmentaidSearches"] = _tiers(
+            _developmentaid_or(titles),
+            [_developmentaid_or(KNOWN_SKILLS[name][1]) for name in core],
+            " + ",
+            f'"{titles[0]}"',
+        )
+
+    return analysis
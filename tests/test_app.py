@@ -0,0 +1,73 @@
+from app import _merge_lists, merge_platform_analyses, validate_developmentaid_search, validate_linkedin_search
+
+
+def test_linkedin_quoted_phrase_words_are_not_operators():
+    validation = validate_linkedin_search('"Monitoring and Evaluation" OR M&E')
+
+    assert validation.valid
+    assert validation.and_count == 0
+    assert validation.or_count == 1
+
+
+def test_linkedin_operators_count_next_to_parentheses():
+    assert validate_linkedin_search('(Python OR Django)AND(Developer)').and_count == 1
+    assert validate_linkedin_search(')AND(').and_count == 1
+
+
+def test_linkedin_lowercase_operator_outside_quotes_is_an_issue():
+    validation = validate_linkedin_search('Python and Django')
+
+    assert not validation.valid
+    assert "Boolean operators must be UPPERCASE (AND, OR, NOT)" in validation.issues
+
+
+def test_linkedin_unbalanced_quotes_and_parentheses():
+    validation = validate_linkedin_search('("Data Science OR Python')
+
+    assert set(validation.issues) == {"Unmatched quotes detected", "Unmatched parentheses"}
+
+
+def test_linkedin_too_many_ands_warns():
+    validation = validate_linkedin_search(" AND ".join(["a", "b", "c", "d", "e", "f"]))
+
+    assert validation.valid
+    assert validation.and_count == 5
+    assert validation.warnings == ("Too many AND operators (5) - may be too restrictive",)
+
+
+def test_developmentaid_counts_symbols_and_spaced_word_operators():
+    validation = validate_developmentaid_search('(water|sanitation)^10 + USAID - "World Bank" AND OR-GAN')
+
+    assert validation.and_count == 2
+    assert validation.or_count == 1
+    assert validation.not_count == 2
+    assert validation.warnings == ("Using uppercase AND/OR/NOT - DevelopmentAid uses +, |, - instead",)
+
+
+def test_developmentaid_wildcard_rules():
+    assert validate_developmentaid_search("financ*").valid
+    assert not validate_developmentaid_search("*finance").valid
+    assert not validate_developmentaid_search('"financ* management"').valid
+
+
+def test_merge_lists_drops_repeats_and_accepts_bare_strings():
+    assert _merge_lists(["a"], "a", None) == ["a"]
+    assert _merge_lists(["a", "b"], ["b", "c"]) == ["a", "b", "c"]
+
+
+def test_merge_lists_keeps_unhashable_items_as_is():
+    tips = [{"tip": "x"}, {"tip": "x"}]
+
+    assert _merge_lists(tips, []) == tips
+
+
+def test_merge_platform_analyses_tolerates_malformed_lists():
+    merged = merge_platform_analyses(
+        {"linkedinSearches": {"broad": "a"}, "warnings": "Few candidates", "manualReviewTips": [{"tip": "x"}]},
+        {"developmentaidSearches": {"broad": "b"}, "warnings": ["Few candidates", "Niche donor"]},
+    )
+
+    assert merged["linkedinSearches"] == {"broad": "a"}
+    assert merged["developmentaidSearches"] == {"broad": "b"}
+    assert merged["warnings"] == ["Few candidates", "Niche donor"]
+    assert merged["manualReviewTips"] == [{"tip": "x"}]
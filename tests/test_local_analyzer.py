@@ -0,0 +1,87 @@
+from local_analyzer import LOCAL_MAX_CHARS, local_analyze
+
+PYTHON_JOB = (
+    "We are hiring a Senior Python Developer with 8 years of Django, "
+    "PostgreSQL and AWS experience. Docker is a plus."
+)
+
+
+def test_builds_analysis_for_short_job_with_known_skills():
+    result = local_analyze(PYTHON_JOB, "both", "general", True)
+
+    assert result["domain_detected"] == "software_engineering"
+    assert result["analysis"]["coreSkills"] == ["Python", "SQL", "Cloud"]
+    assert result["analysis"]["secondarySkills"] == ["DevOps"]
+    assert result["analysis"]["jobTitles"] == ["Senior Python Developer", "Python Developer"]
+    assert result["analysis"]["seniorityLevel"] == "senior"
+    assert set(result["linkedinSearches"]) == {"broad", "primary", "focused", "ultra_specific"}
+    assert set(result["developmentaidSearches"]) == {"broad", "primary", "focused", "ultra_specific"}
+
+
+def test_tiers_add_one_skill_each():
+    searches = local_analyze(PYTHON_JOB, "linkedin", "general", True)["linkedinSearches"]
+
+    assert searches["broad"]["search"] == (
+        '("Senior Python Developer" OR "Python Developer") AND (Python OR Django OR Flask OR FastAPI)'
+    )
+    assert searches["primary"]["search"].count(" AND ") == 2
+    assert searches["focused"]["search"].count(" AND ") == 3
+    assert searches["ultra_specific"]["search"].startswith('title:"Senior Python Developer" AND ')
+
+
+def test_developmentaid_searches_use_symbol_operators():
+    searches = local_analyze(PYTHON_JOB, "developmentaid", "general", True)["developmentaidSearches"]
+
+    assert "linkedinSearches" not in local_analyze(PYTHON_JOB, "developmentaid", "general", True)
+    for tier in searches.values():
+        assert " AND " not in tier["search"] and " OR " not in tier["search"]
+    assert searches["broad"]["search"] == (
+        '("Senior Python Developer" | "Python Developer") + (Python | Django | Flask | FastAPI)'
+    )
+
+
+def test_seniority_prefix_dropped_when_not_requested():
+    result = local_analyze(PYTHON_JOB, "linkedin", "general", False)
+
+    assert result["analysis"]["jobTitles"] == ["Python Developer"]
+    assert result["analysis"]["seniorityLevel"] == "senior"
+
+
+def test_explicit_domain_is_kept():
+    result = local_analyze(PYTHON_JOB, "linkedin", "consulting", True)
+
+    assert result["domain_detected"] == "consulting"
+
+
+def test_everyday_words_are_not_skills():
+    job = (
+        "Junior Marketing Coordinator. You will excel at communication, help shape our "
+        "content strategy and stay agile while working on compliance and audit reports "
+        "for our clinical partners."
+    )
+
+    assert local_analyze(job, "linkedin", "general", True) is None
+
+
+def test_skill_terms_are_case_sensitive():
+    job = "Python Developer: python, sql, aws, docker."
+
+    assert local_analyze(job, "linkedin", "general", True) is None
+
+
+def test_long_job_falls_back_to_model():
+    job = PYTHON_JOB + " " + "x" * LOCAL_MAX_CHARS
+
+    assert local_analyze(job, "linkedin", "general", True) is None
+
+
+def test_job_without_title_falls_back_to_model():
+    job = "Needs Python, PostgreSQL, AWS and Docker."
+
+    assert local_analyze(job, "linkedin", "general", True) is None
+
+
+def test_too_few_skills_falls_back_to_model():
+    job = "Senior Python Developer with Django experience."
+
+    assert local_analyze(job, "linkedin", "general", True) is None